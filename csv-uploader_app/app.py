@@ -11,76 +11,114 @@ import traceback
 import os
 
 def main():
+    # Databricks Apps provides the port and host through the environment
+    port = int(os.getenv('PORT', 8080))
+    host = os.getenv('HOST', '0.0.0.0')
+    
     try:
-        print("🚀 Starting Databricks CSV Uploader App...")
-        print(f"📍 Python version: {sys.version}")
-        print(f"📍 Working directory: {os.getcwd()}")
-        print(f"📍 Python path: {sys.path}")
+        # Startup messages are collected and written in batches rather than
+        # one print (and stdout flush) per line
+        banner = ["🚀 Starting Databricks CSV Uploader App..."]
+        if os.getenv('DEBUG_STARTUP'):
+            banner.append(f"📍 Python version: {sys.version}")
+            banner.append(f"📍 Working directory: {os.getcwd()}")
+            banner.append("📍 Python path:\n  " + "\n  ".join(sys.path))
+        
+        # Validate configuration before paying for the Dash/pandas import
+        from config import validate_config
+        errors = validate_config()
+        if errors:
+            banner.append("❌ Configuration Errors:")
+            banner.extend(f"  - {error}" for error in errors)
+            write_lines(banner)
+            create_error_app("Configuration Error:\n" + "\n".join(errors), host, port)
+            return
         
         # Import with error handling
-        print("📦 Importing main application...")
+        banner.append("📦 Importing main application...")
+        write_lines(banner)
         from databricks_csv_uploader import app
-        print("✅ Successfully imported main application")
-        print("🔄 Authentication will be handled on-demand (lazy loading)")
-        
-        # Check if we're in Databricks Apps environment
-        port = int(os.getenv('PORT', 8080))
-        host = os.getenv('HOST', '0.0.0.0')
-        
-        print(f"🌐 Starting server on {host}:{port}")
+        write_lines([
+            "✅ Successfully imported main application",
+            "🔄 Authentication will be handled on-demand (lazy loading)",
+            f"🌐 Starting server on {host}:{port}"
+        ])
         
-        # For Databricks Apps deployment
-        app.run_server(
-            debug=False, 
-            host=host, 
-            port=port,
-            dev_tools_ui=False,
-            dev_tools_props_check=False,
-            dev_tools_hot_reload=False
-        )
+        # For Databricks Apps deployment, serve the underlying Flask app with
+        # waitress rather than the Flask/werkzeug development server
+        try:
+            from waitress import serve
+        except ImportError:
+            print("⚠️  waitress not installed. Falling back to the Flask development server.")
+            app.run(
+                debug=False,
+                host=host,
+                port=port,
+                dev_tools_ui=False,
+                dev_tools_props_check=False,
+                dev_tools_hot_reload=False
+            )
+        else:
+            serve(app.server, host=host, port=port, threads=8)
         
     except ImportError as e:
         print(f"❌ Import Error: {e}")
-        print(f"📝 Full traceback: {traceback.format_exc()}")
+        print_traceback()
         # Create a simple error page
-        create_error_app(f"Import Error: {e}")
+        create_error_app(f"Import Error: {e}", host, port)
     except Exception as e:
         print(f"❌ Startup Error: {e}")
+        print_traceback()
+        create_error_app(f"Startup Error: {e}", host, port)
+
+def write_lines(lines):
+    """Write a batch of log lines to stdout with a single write and flush"""
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
+
+def print_traceback():
+    """Print the active exception's traceback when LOG_LEVEL is DEBUG or INFO
+    
+    LOG_LEVEL is read from the environment rather than config, as this runs
+    while handling errors that may come from importing config itself.
+    """
+    if os.getenv('LOG_LEVEL', 'INFO').upper() in ("DEBUG", "INFO"):
         print(f"📝 Full traceback: {traceback.format_exc()}")
-        create_error_app(f"Startup Error: {e}")
 
-def create_error_app(error_message):
-    """Create a simple error page when main app fails to load"""
-    import dash
-    from dash import html
+def create_error_app(error_message, host, port):
+    """Serve a static error page when the main app fails to load"""
+    from html import escape
+    from wsgiref.simple_server import make_server
     
-    error_app = dash.Dash(__name__)
+    page = f"""<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Databricks CSV Uploader - Startup Error</title></head>
+<body>
+    <h1 style="color: red">❌ Databricks CSV Uploader - Startup Error</h1>
+    <h3>Error Details:</h3>
+    <pre style="background-color: #f8f8f8; padding: 10px">{escape(error_message)}</pre>
+    <hr>
+    <h3>Troubleshooting:</h3>
+    <ul>
+        <li>Check that all required packages are installed</li>
+        <li>Verify Databricks authentication is properly configured</li>
+        <li>Ensure all Python files are uploaded correctly</li>
+        <li>Check app logs for detailed error information</li>
+    </ul>
+</body>
+</html>
+""".encode('utf-8')
     
-    error_app.layout = html.Div([
-        html.H1("❌ Databricks CSV Uploader - Startup Error", style={'color': 'red'}),
-        html.Div([
-            html.H3("Error Details:"),
-            html.Pre(error_message, style={'backgroundColor': '#f8f8f8', 'padding': '10px'}),
-            html.Hr(),
-            html.H3("Troubleshooting:"),
-            html.Ul([
-                html.Li("Check that all required packages are installed"),
-                html.Li("Verify Databricks authentication is properly configured"),
-                html.Li("Ensure all Python files are uploaded correctly"),
-                html.Li("Check app logs for detailed error information")
-            ])
+    def error_app(environ, start_response):
+        start_response('200 OK', [
+            ('Content-Type', 'text/html; charset=utf-8'),
+            ('Content-Length', str(len(page)))
         ])
-    ])
-    
-    port = int(os.getenv('PORT', 8080))
-    host = os.getenv('HOST', '0.0.0.0')
+        return [page]
     
-    error_app.run_server(
-        debug=True,
-        host=host,
-        port=port,
-        dev_tools_ui=False
-    )
+    with make_server(host, port, error_app) as server:
+        print(f"🌐 Serving error page on {host}:{port}")
+        server.serve_forever()
 
 if __name__ == "__main__":
     main()
@@ -3,66 +3,86 @@ Configuration settings for Databricks CSV to Delta Table Uploader
 Modify these settings to match your Databricks environment
 """
 
+import functools
 import os
-from typing import Optional
-
-# Load environment variables from .env file
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-    print("✅ Loaded environment variables from .env file")
-except ImportError:
-    print("⚠️  python-dotenv not installed. Using system environment variables only.")
-    pass
+from dataclasses import dataclass, field
+from itertools import islice
+from types import MappingProxyType
+
+# .env file next to this module, found regardless of the working directory
+_DOTENV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+
+# Load environment variables from .env file (local development only; the
+# Databricks Apps runtime injects its settings directly into the environment)
+if not os.environ.get('DATABRICKS_APPS_RUNTIME') and os.path.exists(_DOTENV_PATH):
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(_DOTENV_PATH)
+        print("✅ Loaded environment variables from .env file")
+    except ImportError:
+        print("⚠️  python-dotenv not installed. Using system environment variables only.")
+        pass
+
+# Snapshot of the process environment (after any .env overrides) that all
+# settings below are read from
+_ENV = os.environ.copy()
+
+# Placeholder workspace URL used when DATABRICKS_HOST is not configured
+_UNSET_HOST = 'https://your-workspace.cloud.databricks.com'
 
 # Databricks Connection Settings
-DATABRICKS_HOST = os.getenv('DATABRICKS_HOST', 'https://your-workspace.cloud.databricks.com')
-DATABRICKS_TOKEN = os.getenv('DATABRICKS_TOKEN', '')
-DATABRICKS_OAUTH_TOKEN = os.getenv('DATABRICKS_OAUTH_TOKEN', '')
+DATABRICKS_HOST = _ENV.get('DATABRICKS_HOST', _UNSET_HOST)
+DATABRICKS_TOKEN = _ENV.get('DATABRICKS_TOKEN', '')
+DATABRICKS_OAUTH_TOKEN = _ENV.get('DATABRICKS_OAUTH_TOKEN', '')
+# Service principal credentials injected by the Databricks Apps runtime
+DATABRICKS_CLIENT_ID = _ENV.get('DATABRICKS_CLIENT_ID', '')
+DATABRICKS_CLIENT_SECRET = _ENV.get('DATABRICKS_CLIENT_SECRET', '')
 # To find your warehouse ID: Go to Databricks > SQL Warehouses > Click your warehouse > Copy the Server Hostname path
 # Example: /sql/1.0/warehouses/abcd1234567890ef (replace 'your-warehouse-id' with your actual warehouse ID)
-DATABRICKS_HTTP_PATH = os.getenv('DATABRICKS_HTTP_PATH', '/sql/1.0/warehouses/a1a5ed85eea63273')
-
-# Default Unity Catalog Settings
-DEFAULT_CATALOG = os.getenv('DEFAULT_CATALOG', 'ingest_demo')
-DEFAULT_SCHEMA = os.getenv('DEFAULT_SCHEMA', 'medical_providers')
-DEFAULT_VOLUME_PATH = os.getenv('DEFAULT_VOLUME_PATH', '/Volumes/ingest_demo/medical_providers/providers/')
+DATABRICKS_HTTP_PATH = _ENV.get('DATABRICKS_HTTP_PATH', '/sql/1.0/warehouses/a1a5ed85eea63273')
 
 # Application Settings
-APP_PORT = int(os.getenv('PORT', '8050'))
-APP_HOST = os.getenv('HOST', '0.0.0.0')
-DEBUG_MODE = os.getenv('DEBUG', 'true').lower() == 'true'
+APP_PORT = int(_ENV.get('PORT', '8050'))
+APP_HOST = _ENV.get('HOST', '0.0.0.0')
+DEBUG_MODE = _ENV.get('DEBUG', 'true').lower() == 'true'
 
 # File Upload Settings
-MAX_FILE_SIZE_MB = int(os.getenv('MAX_FILE_SIZE_MB', '100'))
+MAX_FILE_SIZE_MB = int(_ENV.get('MAX_FILE_SIZE_MB', '100'))
 ALLOWED_EXTENSIONS = ['csv']
 
-# CSV Parsing Defaults
-DEFAULT_DELIMITER = ','
-DEFAULT_HAS_HEADER = True
-
-# Table Creation Defaults  
-DEFAULT_WRITE_MODE = 'create'  # options: 'create', 'overwrite', 'append'
+# Read-only defaults for Unity Catalog, CSV parsing and table creation
+DEFAULTS = MappingProxyType({
+    'catalog': _ENV.get('DEFAULT_CATALOG', 'ingest_demo'),
+    'schema': _ENV.get('DEFAULT_SCHEMA', 'medical_providers'),
+    'volume_path': _ENV.get('DEFAULT_VOLUME_PATH', '/Volumes/ingest_demo/medical_providers/providers/'),
+    'delimiter': ',',
+    'has_header': True,
+    'write_mode': 'create',  # options: 'create', 'overwrite', 'append'
+})
 
 # UI Settings
 APP_TITLE = "Databricks CSV to Delta Table"
 APP_DESCRIPTION = "Upload CSV files to Databricks volumes and create Delta tables with ease"
 
 # Logging Configuration
-LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_LEVEL = _ENV.get('LOG_LEVEL', 'INFO')
 
+@dataclass(frozen=True, slots=True)
 class DatabaseConfig:
     """Configuration for Databricks authentication and connection"""
     
-    def __init__(self):
-        self.host = DATABRICKS_HOST
-        self.token = DATABRICKS_TOKEN
-        self.oauth_token = DATABRICKS_OAUTH_TOKEN
-        self.http_path = DATABRICKS_HTTP_PATH
+    host: str = DATABRICKS_HOST
+    # Secrets are kept out of the generated __repr__
+    token: str = field(default=DATABRICKS_TOKEN, repr=False)
+    oauth_token: str = field(default=DATABRICKS_OAUTH_TOKEN, repr=False)
+    client_id: str = DATABRICKS_CLIENT_ID
+    client_secret: str = field(default=DATABRICKS_CLIENT_SECRET, repr=False)
+    http_path: str = DATABRICKS_HTTP_PATH
     
     def is_valid(self) -> bool:
         """Check if configuration is valid for authentication"""
-        return bool(self.host and (self.token or self.oauth_token))
+        return bool(self.host and (self.token or self.oauth_token or
+                                   (self.client_id and self.client_secret)))
     
     def get_auth_method(self) -> str:
         """Return the authentication method being used"""
@@ -70,29 +90,37 @@ class DatabaseConfig:
             return "OAuth Token"
         elif self.token:
             return "Personal Access Token"
+        elif self.client_id and self.client_secret:
+            return "Service Principal (OAuth M2M)"
         else:
             return "None"
 
-def validate_config() -> list[str]:
-    """Validate configuration settings"""
-    errors = []
-    
-    db_config = DatabaseConfig()
-    
-    if not db_config.is_valid():
-        errors.append("Please set DATABRICKS_HOST and either DATABRICKS_TOKEN or DATABRICKS_OAUTH_TOKEN")
-    
-    if DATABRICKS_HOST == 'https://your-workspace.cloud.databricks.com':
-        errors.append("Please set your actual Databricks workspace URL in DATABRICKS_HOST")
-    
-    if not DEFAULT_VOLUME_PATH.startswith('/Volumes/'):
-        errors.append("DEFAULT_VOLUME_PATH should start with '/Volumes/'")
-    
-    return errors
+# Configuration snapshot taken once at import time
+CONFIG = DatabaseConfig()
+
+# Configuration checks as (error message, predicate) pairs; a check fails
+# when its predicate returns False for the configuration snapshot
+_CHECKS = (
+    ("Please set DATABRICKS_HOST and either DATABRICKS_TOKEN, DATABRICKS_OAUTH_TOKEN "
+     "or DATABRICKS_CLIENT_ID/DATABRICKS_CLIENT_SECRET",
+     lambda c: c.is_valid()),
+    ("Please set your actual Databricks workspace URL in DATABRICKS_HOST",
+     lambda c: c.host != _UNSET_HOST),
+    ("DEFAULT_VOLUME_PATH should start with '/Volumes/'",
+     lambda c: DEFAULTS['volume_path'].startswith('/Volumes/')),
+)
+
+@functools.cache
+def validate_config(stop_on_first=False) -> tuple[str, ...]:
+    """Validate configuration settings, optionally stopping at the first error"""
+    failed = (msg for msg, check in _CHECKS if not check(CONFIG))
+    if stop_on_first:
+        return tuple(islice(failed, 1))
+    return tuple(failed)
 
 def print_config(hide_sensitive=True):
     """Print current configuration (excluding sensitive data by default)"""
-    db_config = DatabaseConfig()
+    db_config = CONFIG
     
     print("🔧 Current Configuration:")
     print(f"  Databricks Host: {db_config.host}")
@@ -102,13 +130,14 @@ def print_config(hide_sensitive=True):
         print(f"  Token: {db_config.token[:10] + '...' if db_config.token else 'Not set'}")
         print(f"  OAuth Token: {db_config.oauth_token[:10] + '...' if db_config.oauth_token else 'Not set'}")
     
-    print(f"  Default Catalog: {DEFAULT_CATALOG}")
-    print(f"  Default Schema: {DEFAULT_SCHEMA}")  
-    print(f"  Default Volume Path: {DEFAULT_VOLUME_PATH}")
+    print(f"  Default Catalog: {DEFAULTS['catalog']}")
+    print(f"  Default Schema: {DEFAULTS['schema']}")
+    print(f"  Default Volume Path: {DEFAULTS['volume_path']}")
     print(f"  App Port: {APP_PORT}")
     print(f"  Debug Mode: {DEBUG_MODE}")
     print(f"  Max File Size: {MAX_FILE_SIZE_MB}MB")
 
+@functools.cache
 def get_environment_template() -> str:
     """Return environment variables template"""
     return """
@@ -1,41 +1,98 @@
 import dash
-from dash import dcc, html, Input, Output, State, callback, dash_table, no_update, ctx, ALL
+from dash import dcc, html, Input, Output, State, callback, dash_table, no_update, ctx, Patch
 from dash.exceptions import PreventUpdate
 import pandas as pd
-import base64
-import io
+import binascii
+import functools
+import importlib.util
 import os
-import json
 import logging
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Try to import Databricks SDK
+# Check for the Databricks SDK without importing it; the SDK (and its
+# dependency tree) is only loaded on the first Databricks action
 try:
-    from databricks.sdk import WorkspaceClient
-    from databricks.sdk.service.sql import StatementExecutionAPI, StatementState
-    DATABRICKS_AVAILABLE = True
-    logger.info("Databricks SDK available")
+    DATABRICKS_AVAILABLE = importlib.util.find_spec('databricks.sdk') is not None
 except ImportError:
     DATABRICKS_AVAILABLE = False
+
+if DATABRICKS_AVAILABLE:
+    logger.info("Databricks SDK available")
+else:
     logger.warning("Databricks SDK not available")
 
+# Check for pyarrow, used (when installed) to parse whole CSV files with the
+# multithreaded Arrow CSV reader; it is imported on first use
+try:
+    PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Check for orjson, used (when installed) to decode callback request bodies
+try:
+    ORJSON_AVAILABLE = importlib.util.find_spec('orjson') is not None
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Import config
 try:
     import config
 except ImportError:
     logger.warning("config.py not found, using defaults")
     class Config:
-        DEFAULT_CATALOG = 'main'
-        DEFAULT_SCHEMA = 'default'
-        DEFAULT_VOLUME_PATH = '/Volumes/main/default/csv_uploads/'
+        DEFAULTS = {
+            'catalog': 'main',
+            'schema': 'default',
+            'volume_path': '/Volumes/main/default/csv_uploads/',
+        }
         DATABRICKS_HTTP_PATH = '/sql/1.0/warehouses/your-warehouse-id'
     config = Config()
 
 # Undo configuration
 UNDO_LIMIT = 10  # Maximum number of undo steps to keep
+UNDO_STACKS_LIMIT = 64  # Uploads whose undo history is kept, least recently edited dropped first
+
+# Undo stacks by id; undo-stack-store only holds the id and depth
+_undo_stacks = OrderedDict()
+_undo_lock = threading.Lock()
+
+# CSV parsing configuration
+PREVIEW_ROWS = 20  # Number of rows shown in the preview table
+CSV_CHUNK_ROWS = 4096  # Rows parsed for the preview before the full file is needed
+PARSE_CACHE_SIZE = 8  # Parsed staged files kept in memory, least recently used evicted first
+
+# Errors from parsing a whole staged file; uploads only parse the first chunk,
+# so rows past it that cannot be read only fail on the first edit
+CSV_READ_ERRORS = (pd.errors.ParserError, UnicodeDecodeError)
+
+# Parsed staged files by (path, delimiter, has_header, preview_only)
+_parsed = OrderedDict()
+_parsed_lock = threading.Lock()
+
+# Uploaded files are decoded once and staged here for re-parsing; edited
+# DataFrames are kept server-side and spilled here as pickles when evicted
+UPLOAD_DIR = os.path.join(tempfile.gettempdir(), 'csv_uploader')
+B64_CHUNK_CHARS = 4 * 1024 * 1024  # Base64 characters decoded per write when staging uploads (multiple of 4)
+FRAME_CACHE_SIZE = 16  # Edited DataFrames kept in memory, least recently used evicted first
+STAGED_MAX_AGE = 24 * 60 * 60  # Seconds after which abandoned staged files are deleted
+
+# Staged uploads and spilled frames are named by a uuid4 hex id; the stores
+# only hold these ids, never file paths
+STAGED_ID = re.compile(r'[0-9a-f]{32}')
+
+# Edited DataFrames by frame id, one per upload being edited; csv-data-store
+# only holds the id
+_frames = OrderedDict()
+_frames_lock = threading.Lock()
 
 # Databricks client - will be initialized when needed
 w = None
@@ -56,6 +113,7 @@ def get_databricks_client():
         
     try:
         logger.info("Attempting Databricks authentication (lazy load)")
+        from databricks.sdk import WorkspaceClient
         w = WorkspaceClient()
         logger.info("✅ Successfully authenticated with Databricks")
         _auth_attempted = True
@@ -65,38 +123,476 @@ def get_databricks_client():
         _auth_attempted = True
         return None
 
-def push_to_undo_stack(undo_stack, new_state):
-    """Push new state to undo stack, maintaining size limit"""
-    if not undo_stack:
-        undo_stack = []
+def push_to_undo_stack(undo_stack, op):
+    """Push an undo operation to the upload's server-side undo stack
     
-    # Add new state to the stack
-    undo_stack.append(new_state)
+    Operations describe how to reverse a single edit (see apply_undo) instead of
+    holding a copy of the data. undo-stack-store only holds the stack's id and
+    depth; the updated store value is returned.
+    """
+    sid = (undo_stack or {}).get('sid') or uuid.uuid4().hex
     
-    # Keep only the last UNDO_LIMIT states
-    if len(undo_stack) > UNDO_LIMIT:
-        undo_stack = undo_stack[-UNDO_LIMIT:]
+    with _undo_lock:
+        # The bounded deque drops the oldest operations beyond UNDO_LIMIT
+        stack = _undo_stacks.setdefault(sid, deque(maxlen=UNDO_LIMIT))
+        _undo_stacks.move_to_end(sid)
+        stack.append(op)
+        depth = len(stack)
+        
+        # Forget the undo history of the least recently edited uploads; their
+        # frames stay, as the sessions may still be open
+        while len(_undo_stacks) > UNDO_STACKS_LIMIT:
+            _undo_stacks.popitem(last=False)
     
-    return undo_stack
+    return {'sid': sid, 'depth': depth}
 
 def pop_from_undo_stack(undo_stack):
-    """Pop the most recent state from undo stack"""
-    if not undo_stack or len(undo_stack) == 0:
-        return None, []
+    """Pop the most recent operation from the upload's undo stack"""
+    sid = (undo_stack or {}).get('sid')
     
-    # Pop the most recent state
-    previous_state = undo_stack.pop()
-    return previous_state, undo_stack
+    with _undo_lock:
+        stack = _undo_stacks.get(sid)
+        if not stack:
+            return None, {'sid': sid, 'depth': 0}
+        
+        # Pop the most recent operation
+        op = stack.pop()
+        return op, {'sid': sid, 'depth': len(stack)}
+
+def discard_undo_stack(undo_stack):
+    """Remove the upload's undo stack and return the operations it held"""
+    with _undo_lock:
+        return list(_undo_stacks.pop((undo_stack or {}).get('sid'), ()))
+
+def undo_frame_ids(ops):
+    """Return the ids of the edited frames that undo operations refer to"""
+    frame_ids = set()
+    for op in ops:
+        frame_ids.add(op.get('frame'))
+        frame_ids.add(op['before'].get('frame'))
+    return frame_ids - {None}
 
 def get_undo_count(undo_stack):
     """Get the number of available undo steps"""
     if not undo_stack:
         return 0
-    return len(undo_stack)
+    return undo_stack.get('depth', 0)
+
+class SessionExpired(Exception):
+    """Raised when the staged upload or edited frame a store refers to is gone"""
+    
+    def __init__(self):
+        super().__init__("this upload is no longer available on the server, please re-upload the file")
+
+def staged_path(staged_id, extension):
+    """Return the location in UPLOAD_DIR of a staged upload or spilled frame
+    
+    Ids come back from the browser in the stores, so anything other than an id
+    generated by the app is rejected with ValueError.
+    """
+    if not isinstance(staged_id, str) or not STAGED_ID.fullmatch(staged_id):
+        raise ValueError("Invalid upload reference")
+    return os.path.join(UPLOAD_DIR, staged_id + extension)
+
+def upload_path(upload_id):
+    """Return the location of a staged upload"""
+    return staged_path(upload_id, '.csv')
+
+def save_upload(content_string):
+    """Decode base64 upload content into a uniquely named file in UPLOAD_DIR
+    
+    The content is decoded in chunks, so the decoded file is never held in
+    memory as a whole. Returns the upload id.
+    """
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    prune_upload_dir()
+    upload_id = uuid.uuid4().hex
+    with open(upload_path(upload_id), 'wb') as f:
+        for start in range(0, len(content_string), B64_CHUNK_CHARS):
+            f.write(binascii.a2b_base64(content_string[start:start + B64_CHUNK_CHARS]))
+    return upload_id
+
+def prune_upload_dir():
+    """Delete staged uploads and spilled frames left behind by abandoned sessions
+    
+    Files are removed once they have not been written for STAGED_MAX_AGE seconds.
+    """
+    cutoff = time.time() - STAGED_MAX_AGE
+    try:
+        entries = list(os.scandir(UPLOAD_DIR))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+def parse_csv(path, delimiter, has_header, preview_only=False):
+    """Parse a staged CSV file, optionally stopping after the first chunk
+    
+    Results are cached per file and parse settings, so toggling the delimiter
+    or header option back and forth does not re-read the file. The returned
+    DataFrame is shared between callers and must not be modified in place.
+    """
+    key = (path, delimiter, has_header, preview_only)
+    with _parsed_lock:
+        df = _parsed.get(key)
+        if df is not None:
+            _parsed.move_to_end(key)
+            return df
+    
+    df = read_staged_csv(path, delimiter, has_header, preview_only)
+    
+    with _parsed_lock:
+        _parsed[key] = df
+        while len(_parsed) > PARSE_CACHE_SIZE:
+            _parsed.popitem(last=False)
+    return df
+
+def forget_parsed(path):
+    """Drop the cached parses of a staged file"""
+    with _parsed_lock:
+        for key in [key for key in _parsed if key[0] == path]:
+            del _parsed[key]
+
+def read_staged_csv(path, delimiter, has_header, preview_only):
+    """Parse a staged CSV file for parse_csv"""
+    options = dict(
+        delimiter=delimiter,
+        header=0 if has_header else None,
+        engine='c',
+        low_memory=True
+    )
+    
+    if preview_only:
+        # Only the first chunk is tokenized; the rest of the file is never touched
+        with pd.read_csv(path, chunksize=CSV_CHUNK_ROWS, **options) as reader:
+            df = next(reader, None)
+        if df is None:
+            df = pd.read_csv(path, nrows=0, **options)
+        df = df.head(PREVIEW_ROWS)
+    else:
+        df = None
+        if PYARROW_AVAILABLE:
+            try:
+                df = read_csv_arrow(path, delimiter, has_header, parse_csv(path, delimiter, has_header, True))
+            except ValueError as e:
+                logger.info(f"Arrow CSV reader failed, falling back to pandas: {e}")
+        if df is None:
+            df = pd.read_csv(path, **options)
+    
+    if not has_header:
+        df.columns = [f'Column_{i+1}' for i in range(len(df.columns))]
+    
+    return df
+
+def read_csv_arrow(path, delimiter, has_header, preview):
+    """Parse a whole staged CSV file with the Arrow CSV reader
+    
+    Column names are taken from the pandas-parsed preview, so both parsers agree
+    on naming (e.g. duplicate headers), and so are the string and float columns,
+    so text and all-empty columns get the dtypes pandas gives them. Missing
+    values are recognized from the same tokens as pandas and read as NaN. Raises
+    ValueError if the file does not match the preview.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    from pandas.io.parsers.readers import STR_NA_VALUES
+    
+    names = [str(col) for col in preview.columns]
+    arrow_types = {'object': pa.string(), 'float64': pa.float64()}
+    column_types = {name: arrow_types[dtype.name] for name, dtype in zip(names, preview.dtypes)
+                    if dtype.name in arrow_types}
+    table = pa_csv.read_csv(
+        path,
+        read_options=pa_csv.ReadOptions(column_names=names, skip_rows=count_header_rows(path) if has_header else 0),
+        parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+        convert_options=pa_csv.ConvertOptions(column_types=column_types, null_values=sorted(STR_NA_VALUES),
+                                              strings_can_be_null=True)
+    )
+    
+    df = table.to_pandas()
+    df.columns = preview.columns
+    
+    # Missing strings come back as None; pandas gives NaN
+    for i, dtype in enumerate(df.dtypes):
+        if dtype == object:
+            values = df.iloc[:, i]
+            df.isetitem(i, values.where(values.notna(), float('nan')))
+    
+    # Anything the two parsers read differently (e.g. whitespace-only lines
+    # before the header) shows up in the preview rows
+    if not df.head(len(preview)).equals(preview):
+        raise ValueError("Arrow CSV reader disagrees with the preview")
+    return df
+
+def count_header_rows(path):
+    """Return the number of lines up to and including the header row
+    
+    Like pandas, the header is the first non-empty line; the Arrow reader counts
+    the empty lines before it as rows to skip.
+    """
+    with open(path, 'rb') as f:
+        for count, line in enumerate(f, start=1):
+            if line.rstrip(b'\r\n'):
+                return count
+    return 0
+
+def frame_path(frame_id):
+    """Return the on-disk location of a spilled DataFrame"""
+    return staged_path(frame_id, '.pkl')
+
+def cache_frame(frame_id, df):
+    """Add a DataFrame to the in-memory frame cache, spilling the oldest to disk"""
+    with _frames_lock:
+        _frames[frame_id] = df
+        _frames.move_to_end(frame_id)
+        evicted = _frames.popitem(last=False) if len(_frames) > FRAME_CACHE_SIZE else None
+    
+    if evicted:
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        evicted[1].to_pickle(frame_path(evicted[0]))
+
+def drop_frame(frame_id):
+    """Discard an edited DataFrame from memory and disk"""
+    try:
+        path = frame_path(frame_id)
+    except ValueError:
+        return
+    with _frames_lock:
+        _frames.pop(frame_id, None)
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def frame_csv_data(frame_id, df):
+    """Build the csv_data store value referencing an edited DataFrame"""
+    return {'frame': frame_id, 'columns': df.columns.tolist(), 'nrows': len(df)}
+
+def parse_upload(file_data, delimiter, has_header, preview_only=False):
+    """Parse the staged upload that a file_data store value refers to
+    
+    Raises SessionExpired if the staged file has been removed.
+    """
+    try:
+        return parse_csv(upload_path((file_data or {}).get('upload')), delimiter, has_header, preview_only)
+    except FileNotFoundError:
+        raise SessionExpired() from None
+
+def load_frame(csv_data, file_data, preview_only=False):
+    """Return the DataFrame that a csv_data store value refers to
+    
+    Unedited data is parsed from the staged upload (only the preview rows when
+    preview_only is set) and is shared, so it must not be modified in place;
+    use edit_frame to get a DataFrame that can be edited. Raises SessionExpired
+    if the data is no longer available on the server.
+    """
+    frame_id = csv_data.get('frame')
+    if frame_id is None:
+        return parse_upload(file_data, csv_data['delimiter'], csv_data['has_header'], preview_only)
+    
+    path = frame_path(frame_id)
+    with _frames_lock:
+        df = _frames.get(frame_id)
+    if df is None:
+        # Spilled frames of idle sessions are pruned from UPLOAD_DIR
+        try:
+            df = pd.read_pickle(path)
+        except FileNotFoundError:
+            raise SessionExpired() from None
+    cache_frame(frame_id, df)
+    return df
+
+def edit_frame(csv_data, file_data):
+    """Return (frame_id, DataFrame) for editing the data in place
+    
+    The first edit copies the parsed upload into a new frame; later edits
+    modify that same frame and record undo operations instead of copies.
+    """
+    frame_id = csv_data.get('frame')
+    if frame_id is not None:
+        return frame_id, load_frame(csv_data, file_data)
+    
+    frame_id = uuid.uuid4().hex
+    df = load_frame(csv_data, file_data).copy()
+    cache_frame(frame_id, df)
+    return frame_id, df
+
+def df_to_columnar(df):
+    """Serialize a DataFrame as column names plus one value list per column
+    
+    Values are kept in column order rather than keyed by name, as edited
+    headers may repeat a column name.
+    """
+    return {
+        'columns': df.columns.tolist(),
+        'data': [df.iloc[:, i].tolist() for i in range(df.shape[1])]
+    }
+
+def columnar_to_df(columnar):
+    """Rebuild a DataFrame serialized by df_to_columnar"""
+    df = pd.DataFrame(dict(enumerate(columnar['data'])))
+    df.columns = columnar['columns']
+    return df
+
+def pop_column(df, position):
+    """Remove the column at a position in place and return it
+    
+    Works by position, as edited headers may repeat a column name and removing
+    by name would remove every column with that name.
+    """
+    names = df.columns.tolist()
+    df.columns = range(len(names))
+    values = df.pop(position).rename(names[position])
+    df.columns = names[:position] + names[position + 1:]
+    return values
+
+def restore_dtypes(df, dtypes):
+    """Cast columns back to their recorded dtypes where the values allow it
+    
+    Dtypes are listed by column position, as edited headers may repeat a
+    column name.
+    """
+    for i, dtype in enumerate(dtypes[:df.shape[1]]):
+        if str(df.dtypes.iloc[i]) != dtype:
+            try:
+                df.isetitem(i, df.iloc[:, i].astype(dtype))
+            except (ValueError, TypeError):
+                pass
+
+def apply_undo(op, file_data):
+    """Reverse an undo operation and return the csv_data for the restored state
+    
+    Operations are dicts with a 'type', the csv_data from 'before' the edit and
+    the 'frame' that was edited:
+      add_row  - a row was appended; 'dtypes' lists the column dtypes before it
+      add_col  - column 'name' was appended as the last column
+      del_col  - column 'name' was removed from 'position'; 'values' holds the column
+      edit     - the first 'count' rows were replaced from the table; 'cells' holds
+                 [row, column position, old value] for each changed cell, or,
+                 when rows were deleted in the table, 'rows' holds the replaced
+                 rows and column names (see df_to_columnar); 'dtypes' lists the
+                 column dtypes
+      revert   - the data was reverted to the original upload
+    """
+    before = op['before']
+    if op['type'] == 'revert':
+        return before
+    
+    # Undoing the first edit returns to the parsed upload; the frame is no longer needed
+    if before.get('frame') is None:
+        drop_frame(op['frame'])
+        return before
+    
+    frame_id = op['frame']
+    df = load_frame(before, file_data)
+    
+    if op['type'] == 'add_row':
+        df.drop(index=df.index[-1], inplace=True)
+        restore_dtypes(df, op['dtypes'])
+    elif op['type'] == 'add_col':
+        pop_column(df, len(df.columns) - 1)
+    elif op['type'] == 'del_col':
+        df.insert(op['position'], op['name'], op['values'], allow_duplicates=True)
+    elif op['type'] == 'edit' and 'cells' in op:
+        df.columns = before['columns']
+        for row, col, value in op['cells']:
+            df.iat[row, col] = value
+        restore_dtypes(df, op['dtypes'])
+    elif op['type'] == 'edit':
+        head = columnar_to_df(op['rows'])
+        rest = df.iloc[op['count']:].set_axis(head.columns, axis=1)
+        df = pd.concat([head, rest], ignore_index=True)
+        restore_dtypes(df, op['dtypes'])
+        cache_frame(frame_id, df)
+    
+    return frame_csv_data(frame_id, df)
+
+@functools.lru_cache(maxsize=128)
+def build_volume_path(catalog, schema, volume):
+    """Build a Unity Catalog volume path from catalog, schema, and volume names"""
+    if catalog and schema and volume:
+        return f"/Volumes/{catalog}/{schema}/{volume}/"
+    elif catalog and schema:
+        return f"/Volumes/{catalog}/{schema}/"
+    elif catalog:
+        return f"/Volumes/{catalog}/"
+    else:
+        return "/Volumes/"
+
+def preview_records(df):
+    """Return the preview rows of a DataFrame as DataTable records
+    
+    Missing values are given as None, which is how they come back from the
+    browser, so the records can be compared with the table's data.
+    """
+    display_df = df.head(PREVIEW_ROWS)
+    return display_df.astype(object).where(display_df.notna(), None).to_dict('records')
+
+class TableNameChars(dict):
+    """str.translate table that drops characters other than letters, digits and '_'
+    
+    Entries are filled in on first lookup of each character, so translating
+    runs in C once a character has been seen.
+    """
+    def __missing__(self, code):
+        char = chr(code)
+        self[code] = code if char.isalnum() or char == '_' else None
+        return self[code]
+
+TABLE_NAME_CHARS = TableNameChars()
+
+# Delta column types for pandas dtypes; anything else is created as STRING
+SQL_TYPES = {
+    'object': 'STRING',
+    'int64': 'BIGINT',
+    'int32': 'BIGINT',
+    'float64': 'DOUBLE',
+    'float32': 'DOUBLE',
+}
+
+# CREATE TABLE statement generated for the uploaded file, and the
+# characters replaced when the table name is derived from the filename
+SQL_TEMPLATE = """CREATE TABLE {table} (
+  {columns}
+)
+USING DELTA
+LOCATION '{location}'"""
+FILENAME_TABLE_CHARS = str.maketrans(' -', '__')
+
+def parsed_csv_data(df, delimiter, has_header):
+    """Build the csv_data store value for the unedited staged upload"""
+    return {
+        'frame': None,
+        'columns': df.columns.tolist(),
+        'delimiter': delimiter,
+        'has_header': has_header
+    }
 
 # Initialize the Dash app
 app = dash.Dash(__name__, title="Databricks CSV Ingest to Volume and Delta Table")
 
+# Dash encodes callback responses with orjson already (through plotly), but
+# parses every callback request body with Flask's stdlib-based JSON provider
+if ORJSON_AVAILABLE:
+    import orjson
+    from flask.json.provider import DefaultJSONProvider
+
+    class OrjsonProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by orjson"""
+
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, default=self.default,
+                                option=orjson.OPT_NON_STR_KEYS).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.server.json = OrjsonProvider(app.server)
+
 # Custom CSS
 app.index_string = '''
 <!DOCTYPE html>
@@ -277,7 +773,7 @@ app.layout = html.Div(className="main-container", children=[
                 dcc.Input(
                     id='catalog',
                     type='text',
-                    value=getattr(config, 'DEFAULT_CATALOG', 'ingest_demo'),
+                    value=config.DEFAULTS.get('catalog', 'ingest_demo'),
                     style={"width": "100%", "padding": "10px", "borderRadius": "6px", "border": "1px solid #ddd"}
                 ),
             ], style={'width': '48%', 'display': 'inline-block', 'marginRight': '4%'}),
@@ -287,7 +783,7 @@ app.layout = html.Div(className="main-container", children=[
                 dcc.Input(
                     id='schema',
                     type='text',
-                    value=getattr(config, 'DEFAULT_SCHEMA', 'medical_practice'),
+                    value=config.DEFAULTS.get('schema', 'medical_practice'),
                     style={"width": "100%", "padding": "10px", "borderRadius": "6px", "border": "1px solid #ddd"}
                 ),
             ], style={'width': '48%', 'display': 'inline-block'}),
@@ -311,7 +807,9 @@ app.layout = html.Div(className="main-container", children=[
                 dcc.Input(
                     id='volume-path',
                     type='text',
-                    value='/Volumes/ingest_demo/medical_practice/providers/',
+                    value=build_volume_path(config.DEFAULTS.get('catalog', 'ingest_demo'),
+                                            config.DEFAULTS.get('schema', 'medical_practice'),
+                                            'providers'),
                     readOnly=True,
                     style={
                         "width": "100%", 
@@ -433,18 +931,12 @@ def show_auth_status(_):
     Output('volume-path', 'value'),
     [Input('catalog', 'value'),
      Input('schema', 'value'),
-     Input('volume', 'value')]
+     Input('volume', 'value')],
+    prevent_initial_call=True
 )
 def update_volume_path(catalog, schema, volume):
     """Auto-populate volume path based on catalog, schema, and volume inputs"""
-    if catalog and schema and volume:
-        return f"/Volumes/{catalog}/{schema}/{volume}/"
-    elif catalog and schema:
-        return f"/Volumes/{catalog}/{schema}/"
-    elif catalog:
-        return f"/Volumes/{catalog}/"
-    else:
-        return "/Volumes/"
+    return build_volume_path(catalog, schema, volume)
 
 # File upload callback
 @callback(
@@ -468,43 +960,36 @@ def process_upload(contents, filename, delimiter, has_header):
     if contents is None:
         raise PreventUpdate
     
+    upload_id = None
     try:
         # Parse delimiter
         actual_delimiter = delimiter if delimiter != '\\t' else '\t'
         has_header_bool = 'header' in (has_header or [])
         
-        # Decode file content
-        content_type, content_string = contents.split(',')
-        decoded = base64.b64decode(content_string)
+        # Decode file content once and stage it on disk for later re-parsing
+        content_type, _, content_string = contents.partition(',')
+        upload_id = save_upload(content_string)
         
-        # Read CSV
-        df = pd.read_csv(
-            io.StringIO(decoded.decode('utf-8')),
-            delimiter=actual_delimiter,
-            header=0 if has_header_bool else None
-        )
-        
-        if not has_header_bool:
-            df.columns = [f'Column_{i+1}' for i in range(len(df.columns))]
+        # Read only the rows needed for the preview; the full file is parsed on demand
+        df = parse_csv(upload_path(upload_id), actual_delimiter, has_header_bool, preview_only=True)
         
         # Generate table name
         table_name = os.path.splitext(filename)[0].lower().replace(' ', '_').replace('-', '_')
-        table_name = ''.join(c for c in table_name if c.isalnum() or c == '_')
+        table_name = table_name.translate(TABLE_NAME_CHARS)
         
         # Store data
-        file_data = {'contents': contents, 'filename': filename}
-        csv_data = {'data': df.to_dict('records'), 'columns': df.columns.tolist()}
+        file_data = {'upload': upload_id, 'filename': filename}
+        csv_data = parsed_csv_data(df, actual_delimiter, has_header_bool)
         
         # Create preview with header setting
-        has_header_bool = 'header' in (has_header or [])
-        preview = create_preview_table(df, filename=filename, use_first_row_as_header=has_header_bool)
+        preview = preview_table(preview_records(df), df.columns.tolist(), filename=filename, use_first_row_as_header=has_header_bool)
         
         # Hide upload section, show all other sections
         return (
             file_data,
             csv_data,
             csv_data,  # original-data-store (save original data for revert)
-            [],        # undo-stack-store (initialize empty undo stack)
+            {},        # undo-stack-store (initialize empty undo stack)
             {'display': 'none'},  # upload-section (hide after successful upload)
             {'display': 'block'},  # config-section
             {'display': 'block'},  # databricks-config-section  
@@ -515,6 +1000,14 @@ def process_upload(contents, filename, delimiter, has_header):
         )
         
     except Exception as e:
+        # The upload is not kept, so neither is its staged copy
+        if upload_id:
+            forget_parsed(upload_path(upload_id))
+            try:
+                os.remove(upload_path(upload_id))
+            except OSError:
+                pass
+        
         error_preview = html.Div([
             html.H4("Error reading CSV file", style={"color": "#dc3545"}),
             html.P(f"Error: {str(e)}", style={"color": "#721c24"}),
@@ -522,35 +1015,53 @@ def process_upload(contents, filename, delimiter, has_header):
         
         return no_update, no_update, no_update, no_update, no_update, no_update, no_update, no_update, error_preview, no_update, no_update
 
-def create_preview_table(df, filename=None, use_first_row_as_header=True):
-    """Create a preview table with editing capabilities"""
+# Preview table row styles, shared by every preview table
+ODD_ROW_STYLE = {
+    'if': {'row_index': 'odd'},
+    'backgroundColor': '#f8f9fa'
+}
+FIRST_ROW_HIGHLIGHT = {
+    'if': {'row_index': 0},
+    'backgroundColor': '#fff3cd',
+    'border': '2px solid #ffc107',
+    'fontWeight': 'bold'
+}
+
+def create_preview_table(records, column_ids, filename=None, use_first_row_as_header=True):
+    """Create a preview table with editing capabilities
+    
+    Takes the preview rows as DataTable records (see preview_records) and the
+    column ids, so rows that are already in record form need no DataFrame.
+    """
     
     # Limit preview to first 20 rows  
-    display_df = df.head(20)
+    records = records[:20]
     
     # Use first row values as column headers if enabled
-    if use_first_row_as_header and len(df) > 0:
+    if use_first_row_as_header and records:
         # Get first row values as header names
         header_names = []
-        first_row = df.iloc[0]
-        for i, col in enumerate(df.columns):
-            header_value = str(first_row[col]) if pd.notna(first_row[col]) else f"Column_{i+1}"
+        first_row = records[0]
+        for i, col in enumerate(column_ids):
+            header_value = str(first_row.get(col)) if first_row.get(col) is not None else f"Column_{i+1}"
             # Truncate very long headers
             if len(header_value) > 50:
                 header_value = header_value[:47] + "..."
             header_names.append(header_value)
         
-        columns = [{"name": header_names[i], "id": col, "editable": True} for i, col in enumerate(df.columns)]
-        print(f"DEBUG: Created headers from first row: {header_names}")
-        print(f"DEBUG: First row KEPT in data so headers can be edited by editing first row")
+        columns = [{"name": header_names[i], "id": col, "editable": True} for i, col in enumerate(column_ids)]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Created headers from first row: %s", header_names)
+            logger.debug("First row KEPT in data so headers can be edited by editing first row")
     else:
-        columns = [{"name": col, "id": col, "editable": True} for col in df.columns]
-        print(f"DEBUG: Using original column names: {list(df.columns)}")
+        columns = [{"name": col, "id": col, "editable": True} for col in column_ids]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Using original column names: %s", list(column_ids))
     
     # Create editable data table
     table = dash_table.DataTable(
         id='preview-table',
-        data=display_df.to_dict('records'),
+        data=records,
         columns=columns,
         editable=True,
         row_deletable=True,
@@ -575,17 +1086,7 @@ def create_preview_table(df, filename=None, use_first_row_as_header=True):
             'padding': '15px',
             'fontSize': '15px'
         },
-        style_data_conditional=[
-            {
-                'if': {'row_index': 'odd'},
-                'backgroundColor': '#f8f9fa'
-            }
-        ] + ([{
-            'if': {'row_index': 0},
-            'backgroundColor': '#fff3cd',
-            'border': '2px solid #ffc107',
-            'fontWeight': 'bold'
-        }] if use_first_row_as_header else []),
+        style_data_conditional=[ODD_ROW_STYLE] + ([FIRST_ROW_HIGHLIGHT] if use_first_row_as_header else []),
         style_table={'overflowX': 'auto'}
     )
     
@@ -646,7 +1147,7 @@ def create_preview_table(df, filename=None, use_first_row_as_header=True):
                         id='column-delete-dropdown',
                         placeholder="Select column...",
                         style={'width': '200px', 'marginRight': '8px'},
-                        options=[{'label': col, 'value': col} for col in df.columns]  # Populate with current columns
+                        options=[{'label': col, 'value': col} for col in column_ids]  # Populate with current columns
                     ),
                     html.Button("Delete", id='delete-column-btn', n_clicks=0, className="btn-danger", 
                                style={'fontSize': '14px', 'padding': '8px 16px', 'height': '36px', 'verticalAlign': 'middle'})
@@ -657,6 +1158,28 @@ def create_preview_table(df, filename=None, use_first_row_as_header=True):
     
     return html.Div(preview_content)
 
+@functools.lru_cache(maxsize=8)
+def cached_preview_table(column_ids, rows, filename, use_first_row_as_header):
+    """Cached create_preview_table for preview rows given as hashable tuples
+    
+    The returned components are shared between callers and must not be modified.
+    """
+    records = [dict(zip(column_ids, row)) for row in rows]
+    return create_preview_table(records, list(column_ids), filename, use_first_row_as_header)
+
+def preview_table(records, column_ids, filename=None, use_first_row_as_header=True):
+    """Return the preview table for the given preview rows, reusing recent renders
+    
+    Undo, revert and repeated settings changes often show a preview that was
+    rendered moments before; those are served from cached_preview_table.
+    """
+    rows = tuple(tuple(record.get(col) for col in column_ids) for record in records[:PREVIEW_ROWS])
+    try:
+        return cached_preview_table(tuple(column_ids), rows, filename, use_first_row_as_header)
+    except TypeError:
+        # Cell values that cannot be hashed are rendered without the cache
+        return create_preview_table(records, column_ids, filename, use_first_row_as_header)
+
 # Update CSV when delimiter or header settings change
 @callback(
     [Output('csv-data-store', 'data', allow_duplicate=True),
@@ -669,48 +1192,38 @@ def create_preview_table(df, filename=None, use_first_row_as_header=True):
 def update_on_delimiter_change(delimiter, has_header, file_data):
     """Re-process CSV when delimiter or header settings change"""
     trigger_id = ctx.triggered[0]['prop_id'] if ctx.triggered else 'unknown'
-    print(f"DEBUG: Header update callback triggered by {trigger_id} - delimiter={delimiter}, has_header={has_header}, file_data={file_data is not None}")
+    logger.debug("Header update callback triggered by %s - delimiter=%s, has_header=%s, file_data=%s",
+                 trigger_id, delimiter, has_header, file_data is not None)
     
     # Skip initial call when both inputs are None
     if delimiter is None and has_header is None:
-        print("DEBUG: Initial call, skipping")
+        logger.debug("Initial call, skipping")
         raise PreventUpdate
         
     if not file_data:
-        print("DEBUG: No file data, preventing update")
+        logger.debug("No file data, preventing update")
         raise PreventUpdate
     
     try:
         # Parse delimiter
         actual_delimiter = delimiter if delimiter != '\\t' else '\t'
         has_header_bool = 'header' in (has_header or [])
-        print(f"DEBUG: Processing with delimiter='{actual_delimiter}', has_header={has_header_bool}")
+        logger.debug("Processing with delimiter=%r, has_header=%s", actual_delimiter, has_header_bool)
         
-        # Decode file content
-        content_type, content_string = file_data['contents'].split(',')
-        decoded = base64.b64decode(content_string)
-        
-        # Read CSV with new settings
-        df = pd.read_csv(
-            io.StringIO(decoded.decode('utf-8')),
-            delimiter=actual_delimiter,
-            header=0 if has_header_bool else None
-        )
-        
-        if not has_header_bool:
-            df.columns = [f'Column_{i+1}' for i in range(len(df.columns))]
+        # Read the preview rows of the staged file with new settings
+        df = parse_upload(file_data, actual_delimiter, has_header_bool, preview_only=True)
         
         # Store updated data
-        csv_data = {'data': df.to_dict('records'), 'columns': df.columns.tolist()}
+        csv_data = parsed_csv_data(df, actual_delimiter, has_header_bool)
         
         # Create updated preview with header setting
-        preview = create_preview_table(df, filename=file_data['filename'], use_first_row_as_header=has_header_bool)
-        print(f"DEBUG: Successfully updated preview with {len(df)} rows, {len(df.columns)} columns, headers={has_header_bool}")
+        preview = preview_table(preview_records(df), df.columns.tolist(), filename=file_data['filename'], use_first_row_as_header=has_header_bool)
+        logger.debug("Successfully updated preview with %d rows, %d columns, headers=%s", len(df), len(df.columns), has_header_bool)
         
         return csv_data, preview
         
     except Exception as e:
-        print(f"DEBUG: Error in header update callback: {str(e)}")
+        logger.debug("Error in header update callback: %s", e)
         error_preview = html.Div([
             html.H4("Error processing CSV", style={"color": "#dc3545"}),
             html.P(f"Error: {str(e)}", style={"color": "#721c24"}),
@@ -718,129 +1231,198 @@ def update_on_delimiter_change(delimiter, has_header, file_data):
         
         return no_update, error_preview
 
+# Editing controls disabled while an edit callback runs, so edits to an
+# upload's frame are applied one at a time instead of queueing up
+EDIT_CONTROLS_RUNNING = [
+    (Output(button_id, 'disabled'), True, False)
+    for button_id in ('add-row-btn', 'add-col-btn', 'undo-btn', 'revert-btn', 'delete-column-btn')
+]
+
 # Add row callback
 @callback(
     [Output('csv-data-store', 'data', allow_duplicate=True),
      Output('undo-stack-store', 'data', allow_duplicate=True),
-     Output('preview-section', 'children', allow_duplicate=True)],
+     Output('preview-table', 'data', allow_duplicate=True),
+     Output('status-messages', 'children', allow_duplicate=True)],
     Input('add-row-btn', 'n_clicks'),
     [State('csv-data-store', 'data'),
      State('undo-stack-store', 'data'),
      State('file-data-store', 'data')],
-    prevent_initial_call=True
+    prevent_initial_call=True,
+    running=EDIT_CONTROLS_RUNNING
 )
 def add_row(n_clicks, csv_data, undo_stack, file_data):
     """Add a new empty row to the data"""
     if n_clicks == 0 or not csv_data:
         raise PreventUpdate
     
-    # Push current state to undo stack
-    updated_stack = push_to_undo_stack(undo_stack, csv_data.copy() if csv_data else {})
+    try:
+        frame_id, df = edit_frame(csv_data, file_data)
+    except (SessionExpired, *CSV_READ_ERRORS) as e:
+        return no_update, no_update, no_update, html.Div(f"❌ Add row failed: {e}", className="status-error")
+    
+    # Record how to undo before making changes
+    op = {'type': 'add_row', 'before': csv_data, 'frame': frame_id,
+          'dtypes': df.dtypes.astype(str).tolist()}
+    updated_stack = push_to_undo_stack(undo_stack, op)
     
     # Add empty row
-    new_row = {col: '' for col in csv_data['columns']}
-    csv_data['data'].append(new_row)
+    df.loc[len(df)] = ''
+    csv_data = frame_csv_data(frame_id, df)
     
-    # Create updated preview (default to headers enabled for consistency)
-    df = pd.DataFrame(csv_data['data'])
-    preview = create_preview_table(df, filename=file_data.get('filename'), use_first_row_as_header=True)
+    # Append the row to the preview table in place; rows past the preview
+    # are not shown, so the table is left as is
+    if len(df) <= PREVIEW_ROWS:
+        preview_rows = Patch()
+        preview_rows.append({col: '' for col in df.columns})
+    else:
+        preview_rows = no_update
     
-    return csv_data, updated_stack, preview
+    return csv_data, updated_stack, preview_rows, no_update
 
 # Add column callback
 @callback(
     [Output('csv-data-store', 'data', allow_duplicate=True),
      Output('undo-stack-store', 'data', allow_duplicate=True),
-     Output('preview-section', 'children', allow_duplicate=True)],
+     Output('preview-table', 'columns', allow_duplicate=True),
+     Output('preview-table', 'data', allow_duplicate=True),
+     Output('status-messages', 'children', allow_duplicate=True)],
     Input('add-col-btn', 'n_clicks'),
     [State('csv-data-store', 'data'),
      State('undo-stack-store', 'data'),
      State('file-data-store', 'data')],
-    prevent_initial_call=True
+    prevent_initial_call=True,
+    running=EDIT_CONTROLS_RUNNING
 )
 def add_column(n_clicks, csv_data, undo_stack, file_data):
     """Add a new empty column to the data"""
     if n_clicks == 0 or not csv_data:
         raise PreventUpdate
     
-    # Push current state to undo stack
-    updated_stack = push_to_undo_stack(undo_stack, csv_data.copy() if csv_data else {})
+    try:
+        frame_id, df = edit_frame(csv_data, file_data)
+    except (SessionExpired, *CSV_READ_ERRORS) as e:
+        return no_update, no_update, no_update, no_update, html.Div(f"❌ Add column failed: {e}", className="status-error")
     
     # Create new column name
     new_col_name = f"New_Column_{len(csv_data['columns']) + 1}"
     
-    # Add column to schema
-    csv_data['columns'].append(new_col_name)
+    # Record how to undo before making changes
+    op = {'type': 'add_col', 'before': csv_data, 'frame': frame_id, 'name': new_col_name}
+    updated_stack = push_to_undo_stack(undo_stack, op)
+    
+    # Add the column with empty values for all rows
+    df[new_col_name] = ''
+    csv_data = frame_csv_data(frame_id, df)
     
-    # Add empty values to all rows
-    for row in csv_data['data']:
-        row[new_col_name] = ''
+    # Append the column to the preview table in place; like the other headers
+    # it is named after its (empty) first row value
+    preview_columns = Patch()
+    preview_columns.append({"name": "" if len(df) > 0 else new_col_name, "id": new_col_name, "editable": True})
     
-    # Create updated preview (default to headers enabled for consistency)
-    df = pd.DataFrame(csv_data['data'])
-    preview = create_preview_table(df, filename=file_data.get('filename'), use_first_row_as_header=True)
+    # Give every preview row its empty cell, so the column is not read back
+    # as missing values by the next table edit
+    preview_rows = Patch()
+    for i in range(min(PREVIEW_ROWS, len(df))):
+        preview_rows[i][new_col_name] = ''
     
-    return csv_data, updated_stack, preview
+    return csv_data, updated_stack, preview_columns, preview_rows, no_update
 
 # Update CSV data when table is edited and refresh headers if needed
 @callback(
     [Output('csv-data-store', 'data', allow_duplicate=True),
      Output('undo-stack-store', 'data', allow_duplicate=True),
-     Output('preview-section', 'children', allow_duplicate=True)],
+     Output('preview-section', 'children', allow_duplicate=True),
+     Output('status-messages', 'children', allow_duplicate=True)],
     Input('preview-table', 'data'),
     [State('csv-data-store', 'data'),
      State('undo-stack-store', 'data'),
      State('file-data-store', 'data'),
      State('has-header', 'value')],
-    prevent_initial_call=True
+    prevent_initial_call=True,
+    running=EDIT_CONTROLS_RUNNING
 )
 def update_csv_data_with_headers(table_data, csv_data, undo_stack, file_data, has_header):
     """Update CSV data when table is edited and refresh headers if first row changed"""
-    print(f"DEBUG: Table edit callback triggered - rows: {len(table_data) if table_data else 0}")
+    logger.debug("Table edit callback triggered - rows: %d", len(table_data) if table_data else 0)
     
     if not table_data or not csv_data:
-        print("DEBUG: No table data or csv data, preventing update")
+        logger.debug("No table data or csv data, preventing update")
         raise PreventUpdate
     
-    # Push current state to undo stack before making changes
-    updated_stack = push_to_undo_stack(undo_stack, csv_data.copy() if csv_data else {})
+    try:
+        # Ignore updates that leave the preview rows unchanged, such as a row
+        # appended to the table by add_row
+        if table_data == preview_records(load_frame(csv_data, file_data, preview_only=True)):
+            raise PreventUpdate
+        
+        frame_id, df = edit_frame(csv_data, file_data)
+    except (SessionExpired, *CSV_READ_ERRORS) as e:
+        return no_update, no_update, no_update, html.Div(f"❌ Edit failed: {e}", className="status-error")
     
-    # Convert table data back to CSV data format
-    df = pd.DataFrame(table_data)
-    print(f"DEBUG: Updated CSV data - {len(df)} rows, {len(df.columns)} columns")
+    # The table only holds the preview rows; keep the rest of the data after them
+    preview_len = min(PREVIEW_ROWS, len(df))
     
-    csv_data['data'] = df.to_dict('records')
-    csv_data['columns'] = df.columns.tolist()
+    # Record how to undo the edit: only the changed cells when the table kept
+    # all of its rows, otherwise every replaced row
+    old_rows = df.iloc[:preview_len]
+    op = {'type': 'edit', 'before': csv_data, 'frame': frame_id, 'count': len(table_data),
+          'dtypes': df.dtypes.astype(str).tolist()}
+    if len(table_data) == preview_len:
+        column_ids = old_rows.columns.tolist()
+        op['cells'] = [[i, j, old[col]]
+                       for i, (old, new) in enumerate(zip(preview_records(old_rows), table_data))
+                       for j, col in enumerate(column_ids) if new.get(col) != old[col]]
+    else:
+        op['rows'] = df_to_columnar(old_rows)
+    updated_stack = push_to_undo_stack(undo_stack, op)
+    
+    # Convert table data back to CSV data format
+    df = pd.concat([pd.DataFrame(table_data), df.iloc[preview_len:]], ignore_index=True)
+    logger.debug("Updated CSV data - %d rows, %d columns", len(df), len(df.columns))
     
     # If headers are enabled, refresh the preview AND update column names based on first row
     has_header_bool = 'header' in (has_header or [])
     if has_header_bool and len(df) > 0:
-        print("DEBUG: Headers enabled - updating column names AND refreshing preview")
+        logger.debug("Headers enabled - updating column names AND refreshing preview")
         
-        # Update column names in stored CSV data to match first row values
+        # Update column names in stored CSV data to match first row values,
+        # read straight from the first table record
         if len(df) > 0:
-            first_row = df.iloc[0]
-            new_column_names = []
-            for i, col in enumerate(df.columns):
-                header_value = str(first_row[col]) if pd.notna(first_row[col]) else f"Column_{i+1}"
-                new_column_names.append(header_value)
+            column_ids = df.columns.tolist()
+            first_row = table_data[0]
+            new_column_names = [str(first_row[col]) if first_row.get(col) is not None else f"Column_{i+1}"
+                                for i, col in enumerate(column_ids)]
             
-            # Update the DataFrame with new column names
-            df_renamed = df.copy()
-            df_renamed.columns = new_column_names
+            # Rename in place; df was just rebuilt by the concat above, and
+            # assigning columns does not copy the data
+            df.columns = new_column_names
             
             # Update stored data with new column names
-            csv_data['data'] = df_renamed.to_dict('records')
-            csv_data['columns'] = new_column_names
+            cache_frame(frame_id, df)
+            csv_data = frame_csv_data(frame_id, df)
             
-            print(f"DEBUG: Updated column names to: {new_column_names[:5]}...") # Show first 5
+            logger.debug("Updated column names to: %s...", new_column_names[:5]) # Show first 5
         
+        # Show the first PREVIEW_ROWS rows of the renamed data, rather than the
+        # table rows, which are short of rows deleted in the table
         filename = file_data.get('filename', 'data.csv') if file_data else 'data.csv'
-        preview = create_preview_table(df, filename=filename, use_first_row_as_header=True)
-        return csv_data, updated_stack, preview  # Store previous state in undo stack
+        preview = preview_table(preview_records(df), new_column_names, filename=filename, use_first_row_as_header=True)
+        return csv_data, updated_stack, preview, no_update  # Store previous state in undo stack
     else:
         # Headers disabled or no data - just update CSV data
-        return csv_data, updated_stack, no_update  # Store previous state in undo stack
+        cache_frame(frame_id, df)
+        csv_data = frame_csv_data(frame_id, df)
+        
+        # After rows are deleted in the table, refill it with the first
+        # PREVIEW_ROWS rows of the data, as the next edit is merged on that basis
+        if len(table_data) != preview_len:
+            filename = file_data.get('filename', 'data.csv') if file_data else 'data.csv'
+            preview = preview_table(preview_records(df), df.columns.tolist(), filename=filename,
+                                    use_first_row_as_header=has_header_bool)
+        else:
+            preview = no_update
+        return csv_data, updated_stack, preview, no_update  # Store previous state in undo stack
 
 # Remove file callback
 @callback(
@@ -858,13 +1440,30 @@ def update_csv_data_with_headers(table_data, csv_data, undo_stack, file_data, ha
      Output('upload-filename', 'value', allow_duplicate=True),
      Output('table-name', 'value', allow_duplicate=True)],
     Input('remove-file-btn', 'n_clicks'),
+    [State('file-data-store', 'data'),
+     State('csv-data-store', 'data'),
+     State('undo-stack-store', 'data')],
     prevent_initial_call=True
 )
-def remove_file(n_clicks):
+def remove_file(n_clicks, file_data, csv_data, undo_stack):
     """Remove the current file and reset to upload state"""
     if n_clicks == 0:
         raise PreventUpdate
     
+    # Delete the staged copy of the upload
+    if file_data:
+        try:
+            path = upload_path(file_data.get('upload'))
+            forget_parsed(path)
+            os.remove(path)
+        except (OSError, ValueError):
+            pass
+    
+    # Discard the edited frames referenced by the current data and undo stack
+    frame_ids = undo_frame_ids(discard_undo_stack(undo_stack)) | {(csv_data or {}).get('frame')}
+    for frame_id in frame_ids - {None}:
+        drop_frame(frame_id)
+    
     return (
         {'display': 'block'},   # upload-section (show)
         {'display': 'none'},    # config-section (hide)
@@ -874,7 +1473,7 @@ def remove_file(n_clicks):
         {},                     # file-data-store (clear)
         {},                     # csv-data-store (clear)
         {},                     # original-data-store (clear)
-        [],                     # undo-stack-store (clear undo stack)
+        {},                     # undo-stack-store (clear undo stack)
         None,                   # upload-data contents (clear file input)
         html.Div(),             # status-messages (clear)
         '',                     # upload-filename (clear)
@@ -891,24 +1490,26 @@ def remove_file(n_clicks):
     [State('csv-data-store', 'data'),
      State('undo-stack-store', 'data'),
      State('file-data-store', 'data')],
-    prevent_initial_call=True
+    prevent_initial_call=True,
+    running=EDIT_CONTROLS_RUNNING
 )
 def undo_changes(n_clicks, current_data, undo_stack, file_data):
     """Undo last change by restoring previous state from stack"""
     if n_clicks == 0:
         raise PreventUpdate
     
-    # Pop the most recent state from the stack
-    previous_state, updated_stack = pop_from_undo_stack(undo_stack)
+    # Pop the most recent operation from the stack
+    op, updated_stack = pop_from_undo_stack(undo_stack)
     
-    if previous_state is None:
+    if op is None:
         return no_update, no_update, no_update, html.Div("⚠️ No previous state to undo", className="status-warning")
     
     try:
-        # Restore the previous state
-        df = pd.DataFrame(previous_state['data'])
+        # Reverse the operation to restore the previous state
+        previous_state = apply_undo(op, file_data)
+        df = load_frame(previous_state, file_data, preview_only=True)
         filename = file_data.get('filename') if file_data else None
-        preview = create_preview_table(df, filename=filename, use_first_row_as_header=True)
+        preview = preview_table(preview_records(df), df.columns.tolist(), filename=filename, use_first_row_as_header=True)
         
         # Show remaining undo steps
         remaining_steps = get_undo_count(updated_stack)
@@ -925,6 +1526,8 @@ def undo_changes(n_clicks, current_data, undo_stack, file_data):
         )
         
     except Exception as e:
+        # Put the operation back so the undo can be retried
+        push_to_undo_stack(updated_stack, op)
         return no_update, no_update, no_update, html.Div(f"❌ Undo failed: {str(e)}", className="status-error")
 
 # Revert to original callback - restores the originally uploaded data
@@ -938,21 +1541,23 @@ def undo_changes(n_clicks, current_data, undo_stack, file_data):
      State('undo-stack-store', 'data'),
      State('original-data-store', 'data'),
      State('file-data-store', 'data')],
-    prevent_initial_call=True
+    prevent_initial_call=True,
+    running=EDIT_CONTROLS_RUNNING
 )
 def revert_to_original(n_clicks, current_data, undo_stack, original_data, file_data):
     """Revert to the original uploaded data"""
-    if n_clicks == 0 or not original_data or not original_data.get('data'):
+    if n_clicks == 0 or not original_data or not original_data.get('columns'):
         return no_update, no_update, no_update, html.Div("⚠️ No original data to revert to", className="status-warning")
     
     try:
         # Push current state to undo stack before reverting
-        updated_stack = push_to_undo_stack(undo_stack, current_data) if current_data else undo_stack
+        op = {'type': 'revert', 'before': current_data}
+        updated_stack = push_to_undo_stack(undo_stack, op) if current_data else undo_stack
         
         # Restore the original data
-        df = pd.DataFrame(original_data['data'])
+        df = load_frame(original_data, file_data, preview_only=True)
         filename = file_data.get('filename') if file_data else None
-        preview = create_preview_table(df, filename=filename, use_first_row_as_header=True)
+        preview = preview_table(preview_records(df), df.columns.tolist(), filename=filename, use_first_row_as_header=True)
         
         return (
             original_data,  # Restore original CSV data
@@ -1005,7 +1610,8 @@ def update_column_dropdown_options(csv_data):
      State('csv-data-store', 'data'),
      State('undo-stack-store', 'data'),
      State('file-data-store', 'data')],
-    prevent_initial_call=True
+    prevent_initial_call=True,
+    running=EDIT_CONTROLS_RUNNING
 )
 def delete_column_dropdown(n_clicks, selected_column, csv_data, undo_stack, file_data):
     """Delete selected column from dropdown"""
@@ -1027,20 +1633,18 @@ def delete_column_dropdown(n_clicks, selected_column, csv_data, undo_stack, file
         ), None
     
     try:
-        # Push current state to undo stack BEFORE making changes
-        updated_stack = push_to_undo_stack(undo_stack, csv_data.copy() if csv_data else {})
-        
-        # Remove column from schema
-        csv_data['columns'] = [col for col in csv_data['columns'] if col != selected_column]
+        frame_id, df = edit_frame(csv_data, file_data)
         
-        # Remove column from all data rows
-        for row in csv_data['data']:
-            if selected_column in row:
-                del row[selected_column]
+        # Remove the first column with the selected name, keeping it so the
+        # deletion can be undone
+        position = df.columns.tolist().index(selected_column)
+        op = {'type': 'del_col', 'before': csv_data, 'frame': frame_id, 'name': selected_column,
+              'position': position, 'values': pop_column(df, position)}
+        updated_stack = push_to_undo_stack(undo_stack, op)
+        csv_data = frame_csv_data(frame_id, df)
         
         # Create updated preview
-        df = pd.DataFrame(csv_data['data'])
-        preview = create_preview_table(df, filename=file_data.get('filename') if file_data else None, use_first_row_as_header=True)
+        preview = preview_table(preview_records(df), df.columns.tolist(), filename=file_data.get('filename') if file_data else None, use_first_row_as_header=True)
         
         # Success message
         success_msg = html.Div(
@@ -1058,13 +1662,14 @@ def delete_column_dropdown(n_clicks, selected_column, csv_data, undo_stack, file
     Output('status-messages', 'children', allow_duplicate=True),
     Input('upload-btn', 'n_clicks'),
     [State('csv-data-store', 'data'),
+     State('file-data-store', 'data'),
      State('upload-filename', 'value'),
      State('volume-path', 'value')],
     prevent_initial_call=True
 )
-def upload_to_volume(n_clicks, csv_data, upload_filename, volume_path):
+def upload_to_volume(n_clicks, csv_data, file_data, upload_filename, volume_path):
     """Upload processed CSV to Databricks volume"""
-    print(f"DEBUG: Upload button clicked - csv_data has {len(csv_data.get('data', [])) if csv_data else 0} rows")
+    logger.debug("Upload button clicked - csv_data has %d columns", len(csv_data.get('columns', [])) if csv_data else 0)
     
     if n_clicks == 0 or not csv_data:
         raise PreventUpdate
@@ -1074,12 +1679,11 @@ def upload_to_volume(n_clicks, csv_data, upload_filename, volume_path):
         return html.Div("❌ Databricks connection not available", className="status-error")
     
     try:
-        # Convert CSV data back to DataFrame and then to CSV content
-        df = pd.DataFrame(csv_data['data'])
-        print(f"DEBUG: Uploading DataFrame with {len(df)} rows, {len(df.columns)} columns")
-        print(f"DEBUG: First row data: {df.iloc[0].to_dict() if len(df) > 0 else 'No data'}")
-        
-        csv_content = df.to_csv(index=False)
+        # Get the DataFrame to write out as CSV
+        df = load_frame(csv_data, file_data)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Uploading DataFrame with %d rows, %d columns", len(df), len(df.columns))
+            logger.debug("First row data: %s", df.iloc[0].to_dict() if len(df) > 0 else 'No data')
         
         # Determine filename
         filename = upload_filename or "uploaded_data"
@@ -1089,8 +1693,13 @@ def upload_to_volume(n_clicks, csv_data, upload_filename, volume_path):
         # Construct full path
         full_path = f"{volume_path.rstrip('/')}/{filename}"
         
-        # Upload to volume
-        w.files.upload(full_path, csv_content.encode('utf-8'))
+        # Write the CSV to a temporary file and stream it to the volume, so the
+        # CSV text is never held in memory as a whole
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        with tempfile.TemporaryFile(dir=UPLOAD_DIR) as csv_file:
+            df.to_csv(csv_file, index=False, encoding='utf-8')
+            csv_file.seek(0)
+            w.files.upload(full_path, csv_file)
         
         return html.Div(f"✅ Successfully uploaded {filename} to {volume_path}", className="status-success")
         
@@ -1100,56 +1709,40 @@ def upload_to_volume(n_clicks, csv_data, upload_filename, volume_path):
 # Create delta table SQL callback  
 @callback(
     [Output('status-messages', 'children', allow_duplicate=True),
-     Output('execute-sql-btn', 'style', allow_duplicate=True)],
+     Output('execute-sql-btn', 'style', allow_duplicate=True),
+     Output('sql-query-store', 'data')],
     Input('create-table-btn', 'n_clicks'),
     [State('csv-data-store', 'data'),
+     State('file-data-store', 'data'),
      State('table-name', 'value'),
      State('upload-filename', 'value'),
      State('volume-path', 'value')],
     prevent_initial_call=True
 )
-def create_delta_table_sql(n_clicks, csv_data, table_name, upload_filename, volume_path):
+def create_delta_table_sql(n_clicks, csv_data, file_data, table_name, upload_filename, volume_path):
     """Generate SQL to create Delta table"""
     if n_clicks == 0 or not csv_data:
         raise PreventUpdate
     
     try:
         # Generate DataFrame for schema inference
-        df = pd.DataFrame(csv_data['data'])
+        df = load_frame(csv_data, file_data)
         
         # Determine filename and table name
         filename = upload_filename or "uploaded_data"
         if not filename.endswith('.csv'):
             filename += '.csv'
         
-        table_name_final = table_name or filename.replace('.csv', '').replace(' ', '_').replace('-', '_').lower()
+        table_name_final = table_name or filename[:-4].translate(FILENAME_TABLE_CHARS).lower()
         
         # Infer schema from DataFrame
-        columns_sql = []
-        for col_name, dtype in zip(df.columns, df.dtypes):
-            if dtype == 'object':
-                sql_type = 'STRING'
-            elif dtype in ['int64', 'int32']:
-                sql_type = 'BIGINT'
-            elif dtype in ['float64', 'float32']:
-                sql_type = 'DOUBLE'
-            else:
-                sql_type = 'STRING'
-            
-            columns_sql.append(f"`{col_name}` {sql_type}")
+        columns_sql = [f"`{col_name}` {SQL_TYPES.get(dtype.name, 'STRING')}"
+                       for col_name, dtype in zip(df.columns, df.dtypes)]
         
         # Build SQL query
-        columns_def = ',\n  '.join(columns_sql)
         location_path = f"{volume_path.rstrip('/')}/{filename}"
-        
-        sql_query = f"""CREATE TABLE {table_name_final} (
-  {columns_def}
-)
-USING DELTA
-LOCATION '{location_path}'"""
-        
-        # Store the SQL query for execution
-        app.server.sql_query = sql_query
+        sql_query = SQL_TEMPLATE.format(table=table_name_final, columns=',\n  '.join(columns_sql),
+                                        location=location_path)
         
         return (
             html.Div([
@@ -1164,22 +1757,25 @@ LOCATION '{location_path}'"""
                 }),
                 html.P("👆 Click 'Execute SQL' to create the Delta table", style={"marginTop": "10px", "color": "#666"})
             ], className="status-info"),
-            {"display": "inline-block"}  # Show execute button
+            {"display": "inline-block"},  # Show execute button
+            sql_query  # Store the SQL query for execution
         )
         
     except Exception as e:
         return (
             html.Div(f"❌ Error generating SQL: {str(e)}", className="status-error"),
-            {"display": "none"}  # Hide execute button
+            {"display": "none"},  # Hide execute button
+            no_update
         )
 
 # Execute SQL callback
 @callback(
     Output('status-messages', 'children', allow_duplicate=True),
     Input('execute-sql-btn', 'n_clicks'),
+    State('sql-query-store', 'data'),
     prevent_initial_call=True
 )
-def execute_sql_query(n_clicks):
+def execute_sql_query(n_clicks, sql_query):
     """Execute the generated SQL query"""
     if n_clicks == 0:
         raise PreventUpdate
@@ -1205,8 +1801,7 @@ def execute_sql_query(n_clicks):
         ], className="status-error")
     
     try:
-        # Get the stored SQL query
-        sql_query = getattr(app.server, 'sql_query', None)
+        # Check for the stored SQL query
         if not sql_query:
             return html.Div("❌ No SQL query available. Generate SQL first.", className="status-error")
         
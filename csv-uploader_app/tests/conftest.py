@@ -0,0 +1,28 @@
+import base64
+import os
+import sys
+
+import pytest
+
+# The app modules live next to this directory rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import databricks_csv_uploader as uploader
+
+
+@pytest.fixture
+def app_state(tmp_path, monkeypatch):
+    """Stage uploads in a temporary directory and start from empty caches"""
+    monkeypatch.setattr(uploader, 'UPLOAD_DIR', str(tmp_path))
+    uploader._parsed.clear()
+    uploader._frames.clear()
+    uploader._undo_stacks.clear()
+    yield uploader
+    uploader._parsed.clear()
+    uploader._frames.clear()
+    uploader._undo_stacks.clear()
+
+
+def upload_contents(text):
+    """Return dcc.Upload contents for a CSV file with the given text"""
+    return 'data:text/csv;base64,' + base64.b64encode(text.encode()).decode()
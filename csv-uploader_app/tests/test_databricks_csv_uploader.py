@@ -0,0 +1,283 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from conftest import upload_contents
+
+
+def test_file_data_holds_upload_id_not_path(app_state):
+    out = app_state.process_upload(upload_contents("a,b\n1,2\n"), 'data.csv', ',', ['header'])
+    file_data = out[0]
+
+    assert set(file_data) == {'upload', 'filename'}
+    assert os.path.exists(app_state.upload_path(file_data['upload']))
+
+
+@pytest.mark.parametrize('staged_id', ['../../etc/passwd', '/tmp/x', 'ABC', None, 12])
+def test_staged_path_rejects_ids_not_generated_by_app(app_state, staged_id):
+    with pytest.raises(ValueError):
+        app_state.staged_path(staged_id, '.csv')
+
+
+def test_load_frame_rejects_client_supplied_frame_path(app_state, tmp_path):
+    outside = tmp_path.parent / 'outside.pkl'
+    outside.write_bytes(b'')
+    with pytest.raises(ValueError):
+        app_state.load_frame({'frame': '../outside'}, {})
+
+
+def test_remove_file_ignores_client_supplied_paths(app_state, tmp_path):
+    victim = tmp_path.parent / 'victim.csv'
+    victim.write_text('keep')
+    frame = tmp_path.parent / 'victim.pkl'
+    frame.write_text('keep')
+
+    app_state.remove_file(1, {'path': str(victim), 'upload': '../victim'}, {'frame': '../victim'}, {})
+
+    assert victim.exists()
+    assert frame.exists()
+
+
+def csv_text(nrows, header=True):
+    lines = ['name,value'] if header else []
+    lines += [f'row {i},{i}' for i in range(nrows)]
+    return '\n'.join(lines) + '\n'
+
+
+def shown_rows(preview):
+    """Return the rows of the preview table in a rendered preview section"""
+    stack = [preview]
+    while stack:
+        component = stack.pop()
+        if getattr(component, 'id', None) == 'preview-table':
+            return component.data
+        children = getattr(component, 'children', None)
+        stack.extend(children if isinstance(children, list) else [children] if children is not None else [])
+    raise AssertionError("no preview table rendered")
+
+
+def upload(uploader, text, has_header):
+    out = uploader.process_upload(upload_contents(text), 'data.csv', ',', has_header)
+    file_data, csv_data, undo_stack = out[0], out[1], out[3]
+    return file_data, csv_data, undo_stack, shown_rows(out[8])
+
+
+def test_edit_after_row_deletion_keeps_rows_past_preview(app_state):
+    file_data, csv_data, undo_stack, table = upload(app_state, csv_text(40, header=False), [])
+
+    del table[3]
+    csv_data, undo_stack, preview, _ = app_state.update_csv_data_with_headers(
+        table, csv_data, undo_stack, file_data, [])
+    table = shown_rows(preview)
+    assert len(table) == app_state.PREVIEW_ROWS
+
+    table[0] = dict(table[0], Column_2='edited')
+    csv_data, undo_stack, _, _ = app_state.update_csv_data_with_headers(
+        table, csv_data, undo_stack, file_data, [])
+
+    df = app_state.load_frame(csv_data, file_data)
+    assert len(df) == csv_data['nrows'] == 39
+    assert df['Column_1'].tolist() == [f'row {i}' for i in range(40) if i != 3]
+    assert df['Column_2'].iloc[0] == 'edited'
+
+
+def test_header_mode_edit_after_row_deletion_keeps_rows_past_preview(app_state):
+    file_data, csv_data, undo_stack, table = upload(app_state, csv_text(40), ['header'])
+
+    del table[3]
+    csv_data, undo_stack, preview, _ = app_state.update_csv_data_with_headers(
+        table, csv_data, undo_stack, file_data, ['header'])
+    table = shown_rows(preview)
+    assert len(table) == app_state.PREVIEW_ROWS
+
+    value_column = list(table[1])[1]
+    table[1] = dict(table[1], **{value_column: 'edited'})
+    csv_data, undo_stack, preview, _ = app_state.update_csv_data_with_headers(
+        table, csv_data, undo_stack, file_data, ['header'])
+
+    df = app_state.load_frame(csv_data, file_data)
+    assert len(df) == csv_data['nrows'] == 39
+    assert df.iloc[:, 0].tolist() == [f'row {i}' for i in range(40) if i != 3]
+    assert df.iloc[1, 1] == 'edited'
+    assert shown_rows(preview) == app_state.preview_records(df)
+
+
+def test_undo_add_row_with_duplicate_column_names(app_state):
+    file_data, csv_data, undo_stack, table = upload(app_state, csv_text(2), ['header'])
+
+    # Editing the header row can give two columns the same name
+    table[0] = {col: 'same' for col in table[0]}
+    csv_data, undo_stack, _, _ = app_state.update_csv_data_with_headers(
+        table, csv_data, undo_stack, file_data, ['header'])
+    assert csv_data['columns'] == ['same', 'same']
+
+    csv_data, undo_stack, _, _ = app_state.add_row(1, csv_data, undo_stack, file_data)
+    assert csv_data['nrows'] == 3
+
+    csv_data, undo_stack, _, status = app_state.undo_changes(1, csv_data, undo_stack, file_data)
+    assert 'status-success' in status.className
+    assert csv_data['nrows'] == len(app_state.load_frame(csv_data, file_data)) == 2
+
+
+def test_failed_undo_keeps_operation_on_stack(app_state, monkeypatch):
+    file_data, csv_data, undo_stack, _ = upload(app_state, csv_text(2), ['header'])
+    csv_data, undo_stack, _, _ = app_state.add_row(1, csv_data, undo_stack, file_data)
+
+    def fail(op, file_data):
+        raise RuntimeError("boom")
+    with monkeypatch.context() as patched:
+        patched.setattr(app_state, 'apply_undo', fail)
+        result = app_state.undo_changes(1, csv_data, undo_stack, file_data)
+    assert result[1] is app_state.no_update
+
+    csv_data, undo_stack, _, _ = app_state.undo_changes(1, csv_data, undo_stack, file_data)
+    assert csv_data['frame'] is None
+    assert undo_stack['depth'] == 0
+
+
+@pytest.mark.parametrize('text', [
+    "\nname,city\nann,paris\n",
+    "\n\nname,city\r\nann,paris\r\n",
+    "  \nname,city\nann,paris\n",
+    "name,empty,n\nann,,1\nbob,,2\n",
+    "name,name\nann,1.5\n",
+    # Missing-value tokens past the preview rows
+    csv_text(25) + "None,<NA>\nNULL,n/a\n,-nan\n",
+    "name,city\n" + "ann,paris\n" * 25 + "bob,None\ncid,\ndan,<NA>\n",
+])
+def test_full_parse_matches_pandas(app_state, tmp_path, text):
+    path = tmp_path / 'data.csv'
+    path.write_text(text, newline='')
+
+    df = app_state.parse_csv(str(path), ',', True)
+
+    pd.testing.assert_frame_equal(df, pd.read_csv(path))
+
+
+def test_failed_parse_removes_staged_file(app_state, tmp_path):
+    out = app_state.process_upload(upload_contents("a,b\n1,2\n3,4,5,6,7\n"), 'bad.csv', ',', ['header'])
+
+    assert out[0] is app_state.no_update
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_new_upload_prunes_abandoned_staged_files(app_state, tmp_path):
+    stale = tmp_path / ('a' * 32 + '.pkl')
+    stale.write_text('old')
+    old = time.time() - app_state.STAGED_MAX_AGE - 60
+    os.utime(stale, (old, old))
+    fresh = tmp_path / ('b' * 32 + '.csv')
+    fresh.write_text('new')
+
+    upload(app_state, csv_text(2), ['header'])
+
+    assert not stale.exists()
+    assert fresh.exists()
+
+
+def test_evicted_undo_stack_keeps_session_data(app_state, monkeypatch):
+    monkeypatch.setattr(app_state, 'UNDO_STACKS_LIMIT', 1)
+    first = upload(app_state, csv_text(2), ['header'])
+    first_data, _, _, _ = app_state.add_row(1, first[1], first[2], first[0])
+
+    second = upload(app_state, csv_text(2), ['header'])
+    app_state.add_row(1, second[1], second[2], second[0])
+
+    first_data, _, _, status = app_state.add_row(1, first_data, {}, first[0])
+    assert status is app_state.no_update
+    assert first_data['nrows'] == 4
+
+
+def test_missing_server_data_reports_session_expired(app_state, tmp_path, monkeypatch):
+    monkeypatch.setattr(app_state, 'FRAME_CACHE_SIZE', 0)
+    file_data, csv_data, undo_stack, table = upload(app_state, csv_text(2), ['header'])
+    csv_data, undo_stack, _, _ = app_state.add_row(1, csv_data, undo_stack, file_data)
+    for path in tmp_path.iterdir():
+        path.unlink()
+    app_state._parsed.clear()
+
+    with pytest.raises(app_state.SessionExpired):
+        app_state.load_frame(csv_data, file_data)
+    for result in (app_state.add_row(1, csv_data, undo_stack, file_data),
+                   app_state.add_column(1, csv_data, undo_stack, file_data),
+                   app_state.update_csv_data_with_headers(table[:1], csv_data, undo_stack, file_data, ['header'])):
+        assert 'please re-upload' in result[-1].children
+        assert str(tmp_path) not in result[-1].children
+
+
+def test_remove_file_forgets_parsed_data(app_state):
+    file_data, csv_data, undo_stack, _ = upload(app_state, csv_text(2), ['header'])
+    app_state.load_frame(csv_data, file_data)
+    assert app_state._parsed
+
+    app_state.remove_file(1, file_data, csv_data, undo_stack)
+
+    assert not app_state._parsed
+
+
+def test_delete_and_undo_duplicated_column_name(app_state):
+    file_data, csv_data, undo_stack, table = upload(app_state, "a,b,c\nx,y,z\n1,2,3\n", ['header'])
+
+    first, second, third = table[0]
+    table[0] = {first: 'same', second: 'same', third: 'z'}
+    csv_data, undo_stack, _, _ = app_state.update_csv_data_with_headers(
+        table, csv_data, undo_stack, file_data, ['header'])
+    edited = app_state.load_frame(csv_data, file_data).copy()
+
+    csv_data, undo_stack, _, status, _ = app_state.delete_column_dropdown(
+        1, 'same', csv_data, undo_stack, file_data)
+    assert 'status-success' in status.className
+    df = app_state.load_frame(csv_data, file_data)
+    assert df.columns.tolist() == ['same', 'z']
+    assert df.iloc[:, 0].tolist() == ['same', '2']
+
+    csv_data, undo_stack, _, status = app_state.undo_changes(1, csv_data, undo_stack, file_data)
+    assert 'status-success' in status.className
+    pd.testing.assert_frame_equal(app_state.load_frame(csv_data, file_data), edited)
+
+    # Older steps can still be undone
+    csv_data, undo_stack, _, status = app_state.undo_changes(1, csv_data, undo_stack, file_data)
+    assert 'status-success' in status.className
+    assert csv_data['columns'] == ['a', 'b', 'c']
+
+
+def test_bad_row_past_first_chunk_is_reported_on_edit(app_state):
+    rows = app_state.CSV_CHUNK_ROWS + 10
+    text = csv_text(rows) + '1,2,3,4\n'
+    file_data, csv_data, undo_stack, table = upload(app_state, text, ['header'])
+
+    edited = [dict(table[0])] + table[1:]
+    edited[1] = dict(edited[1], **{list(edited[1])[1]: 'edited'})
+    for result in (app_state.add_row(1, csv_data, undo_stack, file_data),
+                   app_state.add_column(1, csv_data, undo_stack, file_data),
+                   app_state.update_csv_data_with_headers(edited, csv_data, undo_stack, file_data, ['header'])):
+        assert result[0] is app_state.no_update
+        assert 'Expected 2 fields' in result[-1].children
+
+
+def apply_patch(value, patch):
+    """Apply the Assign operations of a dash Patch to a copy of a table's rows"""
+    value = [dict(row) for row in value]
+    for operation in patch.to_plotly_json()['operations']:
+        assert operation['operation'] == 'Assign'
+        row, key = operation['location']
+        value[row][key] = operation['params']['value']
+    return value
+
+
+def test_added_column_survives_next_table_edit(app_state):
+    file_data, csv_data, undo_stack, table = upload(app_state, csv_text(3), ['header'])
+
+    csv_data, undo_stack, _, row_patch, _ = app_state.add_column(1, csv_data, undo_stack, file_data)
+    table = apply_patch(table, row_patch)
+    assert all(row['New_Column_3'] == '' for row in table)
+
+    table[1] = dict(table[1], **{list(table[1])[1]: 'edited'})
+    csv_data, undo_stack, _, _ = app_state.update_csv_data_with_headers(
+        table, csv_data, undo_stack, file_data, ['header'])
+
+    df = app_state.load_frame(csv_data, file_data)
+    assert df.columns[-1] == ''
+    assert df.iloc[:, -1].tolist() == [''] * 3